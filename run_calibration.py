@@ -11,7 +11,6 @@ Usage:
     python run_calibration.py
 """
 
-import json
 import os
 import sys
 from pathlib import Path
@@ -62,7 +61,7 @@ class MainWindow(QMainWindow):
         print(f"  torso_centroid:    ({baseline.torso_centroid_x:.4f}, {baseline.torso_centroid_y:.4f})")
         print(f"  captured_at:       {baseline.captured_at:.0f}")
         print("\nFull baseline JSON:")
-        print(json.dumps(json.loads(BASELINE_PATH.read_text()), indent=2))
+        print(BASELINE_PATH.read_text())
 
     def _on_cancelled(self) -> None:
         print("Calibration cancelled.")
@@ -21,14 +21,21 @@ Usage:
 
 from __future__ import annotations
 
-import json
 import math
+import threading
 import time
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, fields
 from enum import Enum, auto
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON encoding for save()/load()
+    orjson = None
+
 # ---------------------------------------------------------------------------
 # MediaPipe landmark indices used for posture analysis (Section 3.2)
 
@@ -40,22 +47,23 @@ RIGHT_SHOULDER = 12
 LEFT_HIP = 23
 RIGHT_HIP = 24
 
-KEY_LANDMARKS = [NOSE, LEFT_EAR, RIGHT_EAR, LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP]
+KEY_LANDMARKS = (NOSE, LEFT_EAR, RIGHT_EAR, LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP)
 
-LANDMARK_GROUPS: dict[str, list[int]] = {
-    "Head":      [NOSE, LEFT_EAR, RIGHT_EAR],
-    "Shoulders": [LEFT_SHOULDER, RIGHT_SHOULDER],
-    "Hips":      [LEFT_HIP, RIGHT_HIP],
+LANDMARK_GROUPS: dict[str, tuple[int, ...]] = {
+    "Head":      (NOSE, LEFT_EAR, RIGHT_EAR),
+    "Shoulders": (LEFT_SHOULDER, RIGHT_SHOULDER),
+    "Hips":      (LEFT_HIP, RIGHT_HIP),
 }
 
 CAPTURE_DURATION_SECONDS = 5.0
+EXPECTED_FPS = 30.0  # Default frame-buffer sizing; the buffer grows if exceeded
 
 
 # ---------------------------------------------------------------------------
 # Data classes
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class LandmarkPoint:
     x: float
     y: float
@@ -63,7 +71,7 @@ class LandmarkPoint:
     visibility: float
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PostureBaseline:
     """Averaged landmark positions representing the user's good-posture reference.
 
@@ -108,34 +116,52 @@ class CalibrationManager:
     """Orchestrates the calibration capture flow.
 
     Thread-safety note: add_frame() is expected to be called from a single
-    background thread (the capture loop). start()/save()/load() may be called
-    from the UI thread before/after capture, but should not overlap with
-    add_frame() calls.
+    background thread (the capture loop). start() may be called from the UI
+    thread at any time; it and add_frame() share a lock, so a restart never
+    interleaves with a frame being stored or the baseline being finalized.
+    save()/load() should be called once capture is complete.
     """
 
     def __init__(
         self,
         capture_duration: float = CAPTURE_DURATION_SECONDS,
         min_visibility: float = 0.5,
+        expected_fps: float = EXPECTED_FPS,
     ) -> None:
         self.capture_duration = capture_duration
         self.min_visibility = min_visibility
 
         self.state: CalibrationState = CalibrationState.IDLE
         self.baseline: Optional[PostureBaseline] = None
-
-        self._frames: list[dict[int, dict]] = []
-        self._start_time: Optional[float] = None
+        # (baseline, encoded JSON) from the last capture; only reused by save()
+        # while that same object is still self.baseline
+        self._encoded: Optional[tuple[PostureBaseline, bytes]] = None
+
+        # Preallocated buffer with one flat row of len(KEY_LANDMARKS) * 4
+        # values per frame, so each frame is stored with a single assignment.
+        # Only the first self._n rows hold captured data.
+        max_frames = max(int(capture_duration * expected_fps * 1.5), 0) + 1
+        self._buf = np.empty((max_frames, len(KEY_LANDMARKS) * 4), dtype=np.float32)
+        self._n = 0
+        # Capture window in integer nanoseconds (time.monotonic_ns)
+        self._start_ns: Optional[int] = None
+        self._capture_ns = 0
+        self._deadline_ns = 0
+        self._lock = threading.Lock()
 
     # ------------------------------------------------------------------
     # Public API
 
     def start(self) -> None:
         """Begin (or restart) the calibration capture window."""
-        self._frames = []
-        self._start_time = time.monotonic()
-        self.baseline = None
-        self.state = CalibrationState.CAPTURING
+        with self._lock:
+            self._n = 0
+            self._start_ns = time.monotonic_ns()
+            self._capture_ns = int(self.capture_duration * 1e9)
+            self._deadline_ns = self._start_ns + self._capture_ns
+            self.baseline = None
+            self._encoded = None
+            self.state = CalibrationState.CAPTURING
 
     def add_frame(self, landmarks) -> CalibrationState:
         """Feed one MediaPipe pose-landmark result into the capture buffer.
@@ -151,15 +177,22 @@ class CalibrationManager:
         if self.state != CalibrationState.CAPTURING:
             return self.state
 
-        if landmarks is not None and self._frame_is_usable(landmarks):
-            self._frames.append(self._extract_frame(landmarks))
+        with self._lock:
+            # Re-check under the lock: start() or a previous frame may have
+            # changed the state since the unlocked fast-path check above.
+            if self.state != CalibrationState.CAPTURING:
+                return self.state
 
-        # Check whether the capture window has elapsed
-        elapsed = time.monotonic() - self._start_time  # type: ignore[operator]
-        if elapsed >= self.capture_duration:
-            self._finalize()
+            if landmarks is not None:
+                self._store_frame(landmarks)
 
-        return self.state
+            # Check whether the capture window has elapsed. This runs after the
+            # frame is stored so the frame that reaches the deadline still counts;
+            # once finalized, the state check above turns later frames into no-ops.
+            if time.monotonic_ns() >= self._deadline_ns:
+                self._finalize()
+
+            return self.state
 
     @property
     def progress(self) -> float:
@@ -168,10 +201,10 @@ class CalibrationManager:
             return 0.0
         if self.state in (CalibrationState.COMPLETE, CalibrationState.FAILED):
             return 1.0
-        if self._start_time is None:
+        if self._start_ns is None:
             return 0.0
-        elapsed = time.monotonic() - self._start_time
-        return min(elapsed / self.capture_duration, 1.0)
+        elapsed_ns = time.monotonic_ns() - self._start_ns
+        return min(elapsed_ns / max(self._capture_ns, 1), 1.0)
 
     # ------------------------------------------------------------------
     # Persistence
@@ -183,10 +216,14 @@ class CalibrationManager:
         """
         if self.baseline is None:
             raise RuntimeError("No baseline to save — run calibration first.")
+        # Reuse the bytes encoded at finalize unless baseline was reassigned
+        if self._encoded is not None and self._encoded[0] is self.baseline:
+            data = self._encoded[1]
+        else:
+            data = _encode_baseline(self.baseline)
         path = Path(path)
         path.parent.mkdir(parents=True, exist_ok=True)
-        with open(path, "w") as fh:
-            json.dump(_baseline_to_dict(self.baseline), fh, indent=2)
+        path.write_bytes(data)
 
     @staticmethod
     def load(path: Path | str) -> PostureBaseline:
@@ -197,37 +234,43 @@ class CalibrationManager:
         path = Path(path)
         if not path.exists():
             raise FileNotFoundError(f"Calibration file not found: {path}")
-        with open(path) as fh:
-            data = json.load(fh)
-        return _baseline_from_dict(data)
+        return _baseline_from_dict(_loads(path.read_bytes()))
 
     # ------------------------------------------------------------------
     # Internal helpers
 
-    def _frame_is_usable(self, landmarks) -> bool:
-        """Return True only if all key landmarks meet the visibility threshold."""
-        return all(
-            landmarks.landmark[idx].visibility >= self.min_visibility
-            for idx in KEY_LANDMARKS
-        )
-
-    def _extract_frame(self, landmarks) -> dict[int, dict]:
-        return {
-            idx: {
-                "x": landmarks.landmark[idx].x,
-                "y": landmarks.landmark[idx].y,
-                "z": landmarks.landmark[idx].z,
-                "visibility": landmarks.landmark[idx].visibility,
-            }
-            for idx in KEY_LANDMARKS
-        }
+    def _store_frame(self, landmarks) -> bool:
+        """Copy the key landmarks of one frame into the next buffer row.
+
+        The frame is only stored if every key landmark meets the visibility
+        threshold; the scan stops at the first one that doesn't.
+        Returns True if the frame was kept.
+        """
+        lms = landmarks.landmark
+        thr = self.min_visibility
+        values: list[float] = []
+        for idx in KEY_LANDMARKS:
+            lm = lms[idx]
+            if lm.visibility < thr:
+                return False
+            values += (lm.x, lm.y, lm.z, lm.visibility)
+
+        if self._n == len(self._buf):
+            self._buf = np.resize(self._buf, (2 * len(self._buf), self._buf.shape[1]))
+        self._buf[self._n] = values
+        self._n += 1
+        return True
 
     def _finalize(self) -> None:
-        if not self._frames:
+        # Called from add_frame() with self._lock held
+        if self._n == 0:
             self.state = CalibrationState.FAILED
             return
-        averaged = _average_frames(self._frames)
+        frames = self._buf[: self._n].reshape(self._n, len(KEY_LANDMARKS), 4)
+        averaged = _average_frames(frames)
         self.baseline = _compute_baseline(averaged)
+        # The baseline doesn't change after capture, so encode it once for save()
+        self._encoded = (self.baseline, _encode_baseline(self.baseline))
         self.state = CalibrationState.COMPLETE
 
 
@@ -247,11 +290,9 @@ def check_landmark_groups(landmarks, min_visibility: float = 0.5) -> dict[str, b
     """
     if landmarks is None:
         return {group: False for group in LANDMARK_GROUPS}
+    lms = landmarks.landmark
     return {
-        group: all(
-            landmarks.landmark[idx].visibility >= min_visibility
-            for idx in indices
-        )
+        group: all(lms[idx].visibility >= min_visibility for idx in indices)
         for group, indices in LANDMARK_GROUPS.items()
     }
 
@@ -260,36 +301,34 @@ def check_landmark_groups(landmarks, min_visibility: float = 0.5) -> dict[str, b
 # Frame averaging
 
 
-def _average_frames(frames: list[dict[int, dict]]) -> dict[int, dict]:
-    """Return per-landmark averages across all captured frames."""
-    n = len(frames)
-    result: dict[int, dict] = {}
-    for idx in KEY_LANDMARKS:
-        result[idx] = {
-            field: sum(f[idx][field] for f in frames) / n
-            for field in ("x", "y", "z", "visibility")
-        }
-    return result
+def _average_frames(frames: np.ndarray) -> np.ndarray:
+    """Return per-landmark averages across all captured frames.
+
+    Args:
+        frames: (n_frames, len(KEY_LANDMARKS), 4) array of captured landmarks.
+
+    Returns:
+        A (len(KEY_LANDMARKS), 4) float64 array of averaged x, y, z, visibility.
+        The reduction accumulates in float64 so long captures stored as
+        float32 don't lose precision.
+    """
+    return frames.mean(axis=0, dtype=np.float64)
 
 
 # ---------------------------------------------------------------------------
 # Baseline computation
 
 
-def _compute_baseline(avg: dict[int, dict]) -> PostureBaseline:
-    def pt(idx: int) -> LandmarkPoint:
-        d = avg[idx]
-        return LandmarkPoint(d["x"], d["y"], d["z"], d["visibility"])
-
-    l_shoulder = pt(LEFT_SHOULDER)
-    r_shoulder = pt(RIGHT_SHOULDER)
-    l_hip = pt(LEFT_HIP)
-    r_hip = pt(RIGHT_HIP)
-    r_ear = pt(RIGHT_EAR)
+def _compute_baseline(avg: np.ndarray) -> PostureBaseline:
+    """Build a baseline from a (len(KEY_LANDMARKS), 4) array of averaged landmarks."""
+    # Rows are in KEY_LANDMARKS order
+    nose, l_ear, r_ear, l_shoulder, r_shoulder, l_hip, r_hip = (
+        LandmarkPoint(*row) for row in avg.tolist()
+    )
 
     return PostureBaseline(
-        nose=pt(NOSE),
-        left_ear=pt(LEFT_EAR),
+        nose=nose,
+        left_ear=l_ear,
         right_ear=r_ear,
         left_shoulder=l_shoulder,
         right_shoulder=r_shoulder,
@@ -307,6 +346,8 @@ def _compute_baseline(avg: dict[int, dict]) -> PostureBaseline:
 # ---------------------------------------------------------------------------
 # Geometry
 
+_RAD2DEG = 180.0 / math.pi
+
 
 def _neck_angle(ear: LandmarkPoint, shoulder: LandmarkPoint) -> float:
     """Forward head angle from vertical (degrees).
@@ -317,52 +358,52 @@ def _neck_angle(ear: LandmarkPoint, shoulder: LandmarkPoint) -> float:
     """
     dx = ear.x - shoulder.x
     dy = shoulder.y - ear.y  # inverted: y increases downward in MediaPipe
-    return math.degrees(math.atan2(dx, dy))
+    return math.atan2(dx, dy) * _RAD2DEG
 
 
 # ---------------------------------------------------------------------------
 # Serialization
 
 
-def _point_to_dict(pt: LandmarkPoint) -> dict:
-    return {"x": pt.x, "y": pt.y, "z": pt.z, "visibility": pt.visibility}
+def _encode_baseline(b: PostureBaseline) -> bytes:
+    """Encode a baseline as indented JSON.
+
+    orjson serializes dataclasses natively, so the intermediate dict from
+    _baseline_to_dict is only built for the stdlib fallback.
+    """
+    if orjson is not None:
+        return orjson.dumps(b, option=orjson.OPT_INDENT_2)
+    import json
+
+    return json.dumps(_baseline_to_dict(b), indent=2).encode()
+
 
+def _loads(raw: bytes) -> dict:
+    if orjson is not None:
+        return orjson.loads(raw)
+    import json
 
-def _point_from_dict(d: dict) -> LandmarkPoint:
-    return LandmarkPoint(d["x"], d["y"], d["z"], d["visibility"])
+    return json.loads(raw)
 
 
 def _baseline_to_dict(b: PostureBaseline) -> dict:
-    return {
-        "nose": _point_to_dict(b.nose),
-        "left_ear": _point_to_dict(b.left_ear),
-        "right_ear": _point_to_dict(b.right_ear),
-        "left_shoulder": _point_to_dict(b.left_shoulder),
-        "right_shoulder": _point_to_dict(b.right_shoulder),
-        "left_hip": _point_to_dict(b.left_hip),
-        "right_hip": _point_to_dict(b.right_hip),
-        "neck_angle": b.neck_angle,
-        "shoulder_y_avg": b.shoulder_y_avg,
-        "shoulder_width": b.shoulder_width,
-        "torso_centroid_x": b.torso_centroid_x,
-        "torso_centroid_y": b.torso_centroid_y,
-        "captured_at": b.captured_at,
-    }
+    return asdict(b)
+
+
+# PostureBaseline fields declared as LandmarkPoint (annotations are strings
+# under `from __future__ import annotations`)
+_LANDMARK_FIELDS = frozenset(
+    f.name for f in fields(PostureBaseline) if f.type in ("LandmarkPoint", LandmarkPoint)
+)
+_POINT_KEYS = tuple(p.name for p in fields(LandmarkPoint))
 
 
 def _baseline_from_dict(d: dict) -> PostureBaseline:
-    return PostureBaseline(
-        nose=_point_from_dict(d["nose"]),
-        left_ear=_point_from_dict(d["left_ear"]),
-        right_ear=_point_from_dict(d["right_ear"]),
-        left_shoulder=_point_from_dict(d["left_shoulder"]),
-        right_shoulder=_point_from_dict(d["right_shoulder"]),
-        left_hip=_point_from_dict(d["left_hip"]),
-        right_hip=_point_from_dict(d["right_hip"]),
-        neck_angle=d["neck_angle"],
-        shoulder_y_avg=d["shoulder_y_avg"],
-        shoulder_width=d["shoulder_width"],
-        torso_centroid_x=d["torso_centroid_x"],
-        torso_centroid_y=d["torso_centroid_y"],
-        captured_at=d["captured_at"],
-    )
+    # Only declared keys are read, so extra keys (top level or per point) are ignored
+    kwargs = {}
+    for f in fields(PostureBaseline):
+        value = d[f.name]
+        if f.name in _LANDMARK_FIELDS:
+            value = LandmarkPoint(**{k: value[k] for k in _POINT_KEYS})
+        kwargs[f.name] = value
+    return PostureBaseline(**kwargs)
@@ -11,6 +11,8 @@ Emits:
 from __future__ import annotations
 
 import math
+import queue
+import threading
 
 import cv2
 import mediapipe as mp
@@ -44,15 +46,24 @@ from src.calibration import (
 # MediaPipe helpers
 
 _mp_pose = mp.solutions.pose
-_mp_drawing = mp.solutions.drawing_utils
-_mp_drawing_styles = mp.solutions.drawing_styles
 
 # ---------------------------------------------------------------------------
 # Constants
 
 PREVIEW_WIDTH = 640
 PREVIEW_HEIGHT = 480
-FRAME_INTERVAL_MS = 33     # ~30 FPS
+FRAME_INTERVAL_MS = 33     # ~30 FPS — how often the UI picks up the newest result
+WORKER_JOIN_TIMEOUT_S = 1.0  # Max wait per worker on shutdown; a camera stuck in
+                             # read() is abandoned (daemon thread) rather than
+                             # freezing the GUI
+INFERENCE_WIDTH = 256      # Frames are downscaled to this width for MediaPipe;
+                           # landmarks are normalised, so the overlay is unaffected
+USE_OPENCL = False         # Run the resize/color conversion through OpenCV's OpenCL
+                           # T-API when a device is available; only pays off for
+                           # large or multiple camera streams
+
+# Qt can display OpenCV's BGR frames directly (Qt >= 5.14); otherwise convert to RGB
+_HAS_BGR888 = hasattr(QImage.Format, "Format_BGR888")
 
 # BGR colors and labels for the posture-critical landmarks
 _KEY_LANDMARK_STYLE: dict[int, tuple[tuple[int, int, int], str]] = {
@@ -65,6 +76,18 @@ _KEY_LANDMARK_STYLE: dict[int, tuple[tuple[int, int, int], str]] = {
     RIGHT_HIP:      ((255, 0, 255), "R. Hip"),
 }
 
+# Skeleton segments drawn between the posture-critical landmarks
+_KEY_CONNECTIONS: tuple[tuple[int, int], ...] = (
+    (LEFT_SHOULDER, RIGHT_SHOULDER),
+    (LEFT_SHOULDER, LEFT_HIP),
+    (RIGHT_SHOULDER, RIGHT_HIP),
+    (LEFT_HIP, RIGHT_HIP),
+    (LEFT_EAR, LEFT_SHOULDER),
+    (RIGHT_EAR, RIGHT_SHOULDER),
+    (NOSE, LEFT_EAR),
+    (NOSE, RIGHT_EAR),
+)
+
 # Positioning tips keyed by the frozenset of group names that are missing
 _POSITIONING_TIPS: dict[frozenset, str] = {
     frozenset(["Head"]):
@@ -119,14 +142,18 @@ class CalibrationView(QWidget):
     def __init__(self, manager: CalibrationManager, parent: QWidget | None = None) -> None:
         super().__init__(parent)
         self._manager = manager
-        self._cap: cv2.VideoCapture | None = None
-        self._pose = _mp_pose.Pose(
-            model_complexity=0,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5,
-        )
         self._timer = QTimer(self)
         self._timer.timeout.connect(self._process_frame)
+
+        # Capture runs on two daemon threads: one reads the camera at its own
+        # rate, the other runs MediaPipe and feeds the manager. The GUI timer
+        # only picks up the newest rendered frame. Each open/close of the
+        # camera gets a fresh _CaptureSession, so threads abandoned on a slow
+        # shutdown never touch the next session's camera, model or queues.
+        self._session: _CaptureSession | None = None
+        self._capturing = False
+        self._last_progress_pct = -1
+
         self._last_landmark_groups: dict[str, bool] = {g: False for g in LANDMARK_GROUPS}
         self._readiness_labels: dict[str, QLabel] = {}
         self._build_ui()
@@ -215,50 +242,90 @@ class CalibrationView(QWidget):
     def closeEvent(self, event) -> None:  # noqa: N802
         self._timer.stop()
         self._close_camera()
-        self._pose.close()
         super().closeEvent(event)
 
     # ------------------------------------------------------------------
     # Camera helpers
 
     def _open_camera(self) -> None:
-        if self._cap is None or not self._cap.isOpened():
-            self._cap = cv2.VideoCapture(0)
-            self._cap.set(cv2.CAP_PROP_FRAME_WIDTH, PREVIEW_WIDTH)
-            self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, PREVIEW_HEIGHT)
-            if not self._cap.isOpened():
-                self._status_label.setText(
-                    "Camera not available. Grant camera access to Terminal in\n"
-                    "System Settings → Privacy & Security → Camera, then relaunch."
-                )
-                self._start_btn.setEnabled(False)
+        if self._session is not None:
+            return
+        cap = cv2.VideoCapture(0)
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, PREVIEW_WIDTH)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, PREVIEW_HEIGHT)
+        # Hold only the newest frame so drivers don't hand us stale ones
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if not cap.isOpened():
+            cap.release()
+            self._status_label.setText(
+                "Camera not available. Grant camera access to Terminal in\n"
+                "System Settings → Privacy & Security → Camera, then relaunch."
+            )
+            self._start_btn.setEnabled(False)
+            return
+        self._start_workers(cap)
 
     def _close_camera(self) -> None:
-        if self._cap is not None and self._cap.isOpened():
-            self._cap.release()
-        self._cap = None
+        self._stop_workers()
+
+    # ------------------------------------------------------------------
+    # Worker threads
+
+    def _start_workers(self, cap: cv2.VideoCapture) -> None:
+        session = _CaptureSession(cap)
+        session.threads = [
+            threading.Thread(target=_grab_loop, args=(session,), daemon=True),
+            threading.Thread(target=_pose_loop, args=(session, self._manager), daemon=True),
+        ]
+        self._session = session
+        for worker in session.threads:
+            worker.start()
+
+    def _stop_workers(self) -> None:
+        """Signal the current session to stop and wait briefly for its threads.
+
+        The threads release the camera and close the model themselves on exit,
+        so a thread still blocked in cap.read() or pose.process() after the
+        timeout is simply abandoned with the resources it owns.
+        """
+        session, self._session = self._session, None
+        if session is None:
+            return
+        session.stop.set()
+        for worker in session.threads:
+            worker.join(timeout=WORKER_JOIN_TIMEOUT_S)
 
     # ------------------------------------------------------------------
     # Frame loop
 
     def _process_frame(self) -> None:
-        if self._cap is None or not self._cap.isOpened():
+        """GUI-thread tick: display the newest processed frame and update the UI."""
+        session = self._session
+        if session is None:
             return
-        ret, frame = self._cap.read()
-        if not ret:
+        if session.error is not None:
+            self._on_pose_error(session.error)
             return
 
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        result = self._pose.process(rgb)
+        try:
+            canvas, groups = session.result_q.get_nowait()
+        except queue.Empty:
+            return
 
-        canvas = _render_frame(frame, result)
         self._update_preview(canvas)
+        self._last_landmark_groups = groups
 
         state = self._manager.state
 
-        if state in (CalibrationState.IDLE, CalibrationState.FAILED):
-            groups = check_landmark_groups(result.pose_landmarks)
-            self._last_landmark_groups = groups
+        if self._capturing and state != CalibrationState.CAPTURING:
+            # The pose thread closed the capture window since the last tick
+            self._capturing = False
+            if state == CalibrationState.COMPLETE:
+                self._on_capture_complete()
+            elif state == CalibrationState.FAILED:
+                self._on_capture_failed()
+
+        elif state in (CalibrationState.IDLE, CalibrationState.FAILED):
             self._update_readiness(groups)
             all_ready = all(groups.values())
             self._start_btn.setEnabled(all_ready)
@@ -275,19 +342,14 @@ class CalibrationView(QWidget):
                 )
 
         elif state == CalibrationState.CAPTURING:
-            self._last_landmark_groups = check_landmark_groups(result.pose_landmarks)
-            self._manager.add_frame(result.pose_landmarks)
-            self._progress_bar.setValue(int(self._manager.progress * 100))
-            remaining = math.ceil(
-                (1.0 - self._manager.progress) * self._manager.capture_duration
-            )
+            progress = self._manager.progress
+            pct = int(progress * 100)
+            if pct != self._last_progress_pct:  # skip repaints when nothing changed
+                self._progress_bar.setValue(pct)
+                self._last_progress_pct = pct
+            remaining = math.ceil((1.0 - progress) * self._manager.capture_duration)
             self._countdown_label.setText(f"Hold still… {max(remaining, 1)}s remaining")
 
-            if self._manager.state == CalibrationState.COMPLETE:
-                self._on_capture_complete()
-            elif self._manager.state == CalibrationState.FAILED:
-                self._on_capture_failed()
-
     def _update_readiness(self, groups: dict[str, bool]) -> None:
         """Refresh the pill labels to reflect current detection state."""
         for group, visible in groups.items():
@@ -300,18 +362,26 @@ class CalibrationView(QWidget):
                 lbl.setStyleSheet(_STYLE_MISSING)
 
     def _update_preview(self, canvas: np.ndarray) -> None:
-        rgb = cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB)
-        h, w, ch = rgb.shape
-        qimg = QImage(rgb.data, w, h, ch * w, QImage.Format.Format_RGB888)
+        if _HAS_BGR888:
+            fmt = QImage.Format.Format_BGR888
+        else:
+            canvas = cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB)
+            fmt = QImage.Format.Format_RGB888
+        h, w = canvas.shape[:2]
+        # Wrap the ndarray's buffer without copying, using its real row stride,
+        # then copy() once so the pixmap never points into worker-owned memory.
+        qimg = QImage(canvas.data, w, h, canvas.strides[0], fmt).copy()
         self._preview.setPixmap(QPixmap.fromImage(qimg))
 
     # ------------------------------------------------------------------
     # Button / event handlers
 
     def _on_start(self) -> None:
+        self._capturing = True
         self._manager.start()
         self._start_btn.setEnabled(False)
         self._progress_bar.setValue(0)
+        self._last_progress_pct = 0
         self._progress_bar.show()
         self._readiness_row.hide()
         self._tip_label.hide()
@@ -329,6 +399,15 @@ class CalibrationView(QWidget):
         self._close_camera()
         self.calibration_cancelled.emit()
 
+    def _on_pose_error(self, exc: Exception) -> None:
+        self._timer.stop()
+        self._close_camera()
+        self._start_btn.setEnabled(False)
+        self._status_label.setText(
+            f"Pose tracking stopped unexpectedly ({exc}).\n"
+            "Close this window and reopen it to try again."
+        )
+
     def _on_capture_complete(self) -> None:
         self._progress_bar.setValue(100)
         self._countdown_label.hide()
@@ -372,6 +451,109 @@ class CalibrationView(QWidget):
         self._instruction_label.setText("Adjust your position and try again.")
 
 
+# ---------------------------------------------------------------------------
+# Worker threads
+
+
+class _CaptureSession:
+    """Everything one generation of worker threads shares.
+
+    The grab thread owns ``cap`` and releases it when it exits; the pose
+    thread creates and closes its own MediaPipe model. The widget only sets
+    ``stop``.
+    """
+
+    def __init__(self, cap: cv2.VideoCapture) -> None:
+        self.cap = cap
+        self.stop = threading.Event()
+        self.raw_q: queue.Queue[np.ndarray] = queue.Queue(maxsize=2)
+        self.result_q: queue.Queue[tuple[np.ndarray, dict[str, bool]]] = queue.Queue(maxsize=1)
+        self.error: Exception | None = None  # set if the pose thread dies
+        self.threads: list[threading.Thread] = []
+
+
+def _grab_loop(session: _CaptureSession) -> None:
+    """Read frames at camera rate, keeping only the newest if inference lags."""
+    cap, stop = session.cap, session.stop
+    try:
+        while not stop.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                stop.wait(FRAME_INTERVAL_MS / 1000)
+                continue
+            _put_latest(session.raw_q, frame)
+    finally:
+        cap.release()  # only this thread ever reads from cap
+
+
+def _pose_loop(session: _CaptureSession, manager: CalibrationManager) -> None:
+    """Run pose estimation on captured frames and feed the calibration manager.
+
+    The MediaPipe model is created, used and closed on this thread only, so it
+    can never be closed while a process() call is still running. An exception
+    stops the session and is recorded in ``session.error`` so the GUI thread
+    can report it instead of leaving the preview frozen.
+    """
+    pose = None
+    try:
+        pose = _mp_pose.Pose(
+            model_complexity=0,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5,
+        )
+        _run_pose_loop(session, pose, manager)
+    except Exception as exc:  # noqa: BLE001 — surfaced to the UI
+        session.error = exc
+        session.stop.set()
+    finally:
+        if pose is not None:
+            pose.close()
+
+
+def _run_pose_loop(session: _CaptureSession, pose, manager: CalibrationManager) -> None:
+    use_umat = USE_OPENCL and cv2.ocl.haveOpenCL()
+    while not session.stop.is_set():
+        try:
+            frame = session.raw_q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+
+        # Downscale first so the color conversion only touches the small image
+        h, w = frame.shape[:2]
+        small = cv2.resize(
+            cv2.UMat(frame) if use_umat else frame,
+            (INFERENCE_WIDTH, INFERENCE_WIDTH * h // w),
+            interpolation=cv2.INTER_AREA,
+        )
+        rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+        if use_umat:
+            rgb = rgb.get()  # MediaPipe needs a host ndarray
+        rgb.flags.writeable = False  # lets MediaPipe skip its defensive copy
+        result = pose.process(rgb)
+
+        groups = check_landmark_groups(result.pose_landmarks)
+        manager.add_frame(result.pose_landmarks)  # no-op unless capturing
+
+        _put_latest(session.result_q, (_render_frame(frame, result), groups))
+
+
+# ---------------------------------------------------------------------------
+# Thread hand-off
+
+
+def _put_latest(q: queue.Queue, item) -> None:
+    """Put without blocking, discarding the oldest queued item if the queue is full."""
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+
+
 # ---------------------------------------------------------------------------
 # Frame rendering (module-level so it can be tested independently)
 
@@ -379,39 +561,41 @@ class CalibrationView(QWidget):
 def _render_frame(frame: np.ndarray, result) -> np.ndarray:
     """Draw the camera feed with pose skeleton and highlighted posture landmarks.
 
+    The overlay is drawn into ``frame`` in place — each captured frame is used
+    once, so copying it first would only add a full-frame allocation per tick.
+
     Args:
-        frame:  Raw BGR frame from the webcam.
+        frame:  Raw BGR frame from the webcam. Modified in place.
         result: A MediaPipe Pose process() result.
 
     Returns:
-        A (PREVIEW_HEIGHT, PREVIEW_WIDTH, 3) uint8 BGR array ready to display.
+        ``frame``, a (PREVIEW_HEIGHT, PREVIEW_WIDTH, 3) uint8 BGR array ready to display.
     """
-    canvas = frame.copy()
+    canvas = frame
 
     if not result.pose_landmarks:
         return canvas
 
-    # Draw all connections and generic landmarks subtly
-    _mp_drawing.draw_landmarks(
-        canvas,
-        result.pose_landmarks,
-        _mp_pose.POSE_CONNECTIONS,
-        landmark_drawing_spec=_mp_drawing.DrawingSpec(
-            color=(200, 200, 200), thickness=1, circle_radius=2
-        ),
-        connection_drawing_spec=_mp_drawing.DrawingSpec(
-            color=(180, 180, 180), thickness=1
-        ),
-    )
-
-    # Highlight the posture-critical landmarks with colored dots and labels
+    # Pixel positions of the visible posture-critical landmarks
     lm = result.pose_landmarks.landmark
-    for idx, (color, label) in _KEY_LANDMARK_STYLE.items():
+    points: dict[int, tuple[int, int]] = {}
+    for idx in _KEY_LANDMARK_STYLE:
         pt = lm[idx]
-        if pt.visibility < 0.5:
-            continue
-        cx = int(pt.x * PREVIEW_WIDTH)
-        cy = int(pt.y * PREVIEW_HEIGHT)
+        if pt.visibility >= 0.5:
+            points[idx] = (int(pt.x * PREVIEW_WIDTH), int(pt.y * PREVIEW_HEIGHT))
+
+    # Draw the skeleton between them subtly, in one call
+    segments = [
+        np.array((points[a], points[b]), dtype=np.int32)
+        for a, b in _KEY_CONNECTIONS
+        if a in points and b in points
+    ]
+    if segments:
+        cv2.polylines(canvas, segments, False, (180, 180, 180), 1)
+
+    # Highlight the landmarks with colored dots and labels
+    for idx, (cx, cy) in points.items():
+        color, label = _KEY_LANDMARK_STYLE[idx]
         cv2.circle(canvas, (cx, cy), 8, color, -1)
         cv2.circle(canvas, (cx, cy), 8, (255, 255, 255), 1)  # white outline
         cv2.putText(
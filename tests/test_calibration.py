@@ -11,13 +11,15 @@ Tests cover:
 
 from __future__ import annotations
 
+import dataclasses
 import json
-import math
+import threading
 import time
-from pathlib import Path
+from math import isclose
 from types import SimpleNamespace
 from unittest.mock import patch
 
+import numpy as np
 import pytest
 
 from src.calibration import (
@@ -45,14 +47,40 @@ from src.calibration import (
 # ---------------------------------------------------------------------------
 # Helpers
 
+# Row of each key landmark in the (len(KEY_LANDMARKS), 4) landmark arrays
+_KEY_INDEX = {idx: i for i, idx in enumerate(KEY_LANDMARKS)}
+
+# Top-level keys of the saved calibration JSON
+_EXPECTED_BASELINE_KEYS = frozenset({
+    "nose", "left_ear", "right_ear", "left_shoulder", "right_shoulder",
+    "left_hip", "right_hip", "neck_angle", "shoulder_y_avg",
+    "shoulder_width", "torso_centroid_x", "torso_centroid_y", "captured_at",
+})
+
+
+class _FakeLM:
+    """Stand-in for a MediaPipe NormalizedLandmark."""
+
+    __slots__ = ("x", "y", "z", "visibility")
+
+    def __init__(self, x=0.5, y=0.5, z=0.0, visibility=0.9):
+        self.x, self.y, self.z, self.visibility = x, y, z, visibility
+
 
 def _make_landmark(x=0.5, y=0.5, z=0.0, visibility=0.9):
-    return SimpleNamespace(x=x, y=y, z=z, visibility=visibility)
+    return _FakeLM(x=x, y=y, z=z, visibility=visibility)
+
+
+# Shared default landmarks — tests replace list entries but never mutate them
+_DEFAULT_LANDMARKS = tuple(_make_landmark() for _ in range(33))
 
 
 def _make_landmarks(overrides: dict | None = None, visibility=0.9):
     """Build a fake MediaPipe NormalizedLandmarkList with 33 landmarks."""
-    lms = [_make_landmark(visibility=visibility) for _ in range(33)]
+    if visibility == 0.9:
+        lms = list(_DEFAULT_LANDMARKS)
+    else:
+        lms = [_make_landmark(visibility=visibility) for _ in range(33)]
     if overrides:
         for idx, kwargs in overrides.items():
             lm = _make_landmark(**kwargs)
@@ -64,26 +92,42 @@ def _make_manager(**kwargs) -> CalibrationManager:
     return CalibrationManager(**kwargs)
 
 
+@pytest.fixture(scope="module")
+def completed_mgr() -> CalibrationManager:
+    """A manager that has finished a one-frame capture. Tests must not mutate it."""
+    mgr = _make_manager(capture_duration=0.0)
+    mgr.start()
+    mgr.add_frame(_make_landmarks())
+    return mgr
+
+
 # ---------------------------------------------------------------------------
 # State machine
 
 
 class TestCalibrationState:
-    def test_initial_state_is_idle(self):
-        mgr = _make_manager()
-        assert mgr.state == CalibrationState.IDLE
-
-    def test_start_transitions_to_capturing(self):
-        mgr = _make_manager()
-        mgr.start()
-        assert mgr.state == CalibrationState.CAPTURING
+    @pytest.mark.parametrize("capture_duration, actions, expected", [
+        (CAPTURE_DURATION_SECONDS, [], CalibrationState.IDLE),
+        (CAPTURE_DURATION_SECONDS, ["start"], CalibrationState.CAPTURING),
+        (CAPTURE_DURATION_SECONDS, ["start", "frame", "start"], CalibrationState.CAPTURING),
+        (0.0, ["start", "frame"], CalibrationState.COMPLETE),
+    ])
+    def test_state_after_actions(self, capture_duration, actions, expected):
+        mgr = _make_manager(capture_duration=capture_duration)
+        for action in actions:
+            if action == "start":
+                mgr.start()
+            else:
+                mgr.add_frame(_make_landmarks())
+        assert mgr.state == expected
 
     def test_restart_resets_frames_and_baseline(self):
         mgr = _make_manager()
         mgr.start()
-        mgr._frames.append({"dummy": True})
+        mgr.add_frame(_make_landmarks())
+        assert mgr._n == 1
         mgr.start()
-        assert mgr._frames == []
+        assert mgr._n == 0
         assert mgr.baseline is None
         assert mgr.state == CalibrationState.CAPTURING
 
@@ -92,7 +136,7 @@ class TestCalibrationState:
         lms = _make_landmarks()
         state = mgr.add_frame(lms)
         assert state == CalibrationState.IDLE
-        assert mgr._frames == []
+        assert mgr._n == 0
 
     def test_add_frame_after_complete_is_noop(self):
         mgr = _make_manager(capture_duration=0.0)
@@ -103,6 +147,17 @@ class TestCalibrationState:
         mgr.add_frame(_make_landmarks())
         assert mgr.baseline is prev_baseline  # unchanged
 
+    def test_start_waits_for_in_flight_frame(self):
+        mgr = _make_manager()
+        mgr.start()
+        with mgr._lock:  # simulate add_frame() mid-way on the capture thread
+            restart = threading.Thread(target=mgr.start)
+            restart.start()
+            restart.join(timeout=0.05)
+            assert restart.is_alive()
+        restart.join()
+        assert mgr.state == CalibrationState.CAPTURING
+
 
 # ---------------------------------------------------------------------------
 # Progress
@@ -122,14 +177,19 @@ class TestProgress:
     def test_progress_increases_over_time(self):
         mgr = _make_manager(capture_duration=10.0)
         mgr.start()
-        # Patch monotonic to simulate 5 seconds elapsed
-        with patch("src.calibration.time.monotonic", return_value=mgr._start_time + 5.0):
+        # Patch monotonic_ns to simulate 5 seconds elapsed
+        with patch("src.calibration.time.monotonic_ns", return_value=mgr._start_ns + 5_000_000_000):
             assert abs(mgr.progress - 0.5) < 0.01
 
+    def test_progress_with_zero_length_window(self):
+        mgr = _make_manager(capture_duration=0.0)
+        mgr.start()
+        assert mgr.progress == 1.0
+
     def test_progress_capped_at_one(self):
         mgr = _make_manager(capture_duration=1.0)
         mgr.start()
-        with patch("src.calibration.time.monotonic", return_value=mgr._start_time + 999.0):
+        with patch("src.calibration.time.monotonic_ns", return_value=mgr._start_ns + 999_000_000_000):
             assert mgr.progress == 1.0
 
 
@@ -142,7 +202,7 @@ class TestFrameFiltering:
         mgr = _make_manager()
         mgr.start()
         mgr.add_frame(None)
-        assert mgr._frames == []
+        assert mgr._n == 0
 
     def test_low_visibility_frame_is_dropped(self):
         mgr = _make_manager(min_visibility=0.5)
@@ -150,14 +210,14 @@ class TestFrameFiltering:
         # All key landmarks have visibility 0.3 — below threshold
         lms = _make_landmarks(visibility=0.3)
         mgr.add_frame(lms)
-        assert mgr._frames == []
+        assert mgr._n == 0
 
     def test_high_visibility_frame_is_kept(self):
         mgr = _make_manager(min_visibility=0.5)
         mgr.start()
         lms = _make_landmarks(visibility=0.9)
         mgr.add_frame(lms)
-        assert len(mgr._frames) == 1
+        assert mgr._n == 1
 
     def test_partial_visibility_failure_drops_frame(self):
         """If just one key landmark is below threshold, the whole frame is dropped."""
@@ -167,7 +227,7 @@ class TestFrameFiltering:
         # Override one key landmark to be below threshold
         lms.landmark[NOSE] = _make_landmark(visibility=0.1)
         mgr.add_frame(lms)
-        assert mgr._frames == []
+        assert mgr._n == 0
 
     def test_no_usable_frames_results_in_failed(self):
         mgr = _make_manager(capture_duration=0.0, min_visibility=0.9)
@@ -183,22 +243,25 @@ class TestFrameFiltering:
 
 class TestAveraging:
     def test_single_frame_averages_to_itself(self):
-        frame = {idx: {"x": 0.1 * idx, "y": 0.2 * idx, "z": 0.0, "visibility": 0.9}
-                 for idx in KEY_LANDMARKS}
-        result = _average_frames([frame])
-        for idx in KEY_LANDMARKS:
-            assert result[idx]["x"] == pytest.approx(frame[idx]["x"])
-            assert result[idx]["y"] == pytest.approx(frame[idx]["y"])
+        frame = np.array([[0.1 * idx, 0.2 * idx, 0.0, 0.9] for idx in KEY_LANDMARKS])
+        result = _average_frames(frame[np.newaxis])
+        for i in range(len(KEY_LANDMARKS)):
+            assert isclose(result[i, 0], frame[i, 0], abs_tol=1e-7)
+            assert isclose(result[i, 1], frame[i, 1], abs_tol=1e-7)
 
     def test_two_frames_averaged_correctly(self):
-        frame_a = {idx: {"x": 0.0, "y": 0.0, "z": 0.0, "visibility": 1.0}
-                   for idx in KEY_LANDMARKS}
-        frame_b = {idx: {"x": 1.0, "y": 1.0, "z": 0.0, "visibility": 1.0}
-                   for idx in KEY_LANDMARKS}
-        result = _average_frames([frame_a, frame_b])
-        for idx in KEY_LANDMARKS:
-            assert result[idx]["x"] == pytest.approx(0.5)
-            assert result[idx]["y"] == pytest.approx(0.5)
+        frame_a = np.tile([0.0, 0.0, 0.0, 1.0], (len(KEY_LANDMARKS), 1))
+        frame_b = np.tile([1.0, 1.0, 0.0, 1.0], (len(KEY_LANDMARKS), 1))
+        result = _average_frames(np.stack([frame_a, frame_b]))
+        for i in range(len(KEY_LANDMARKS)):
+            assert isclose(result[i, 0], 0.5, abs_tol=1e-7)
+            assert isclose(result[i, 1], 0.5, abs_tol=1e-7)
+
+    def test_float32_frames_average_to_float64(self):
+        frames = np.full((3, len(KEY_LANDMARKS), 4), 0.25, dtype=np.float32)
+        result = _average_frames(frames)
+        assert result.dtype == np.float64
+        assert result.shape == (len(KEY_LANDMARKS), 4)
 
 
 # ---------------------------------------------------------------------------
@@ -206,9 +269,8 @@ class TestAveraging:
 
 
 class TestBaselineComputation:
-    def _make_avg(self, x=0.5, y=0.5) -> dict:
-        return {idx: {"x": x, "y": y, "z": 0.0, "visibility": 0.9}
-                for idx in KEY_LANDMARKS}
+    def _make_avg(self, x=0.5, y=0.5) -> np.ndarray:
+        return np.tile([x, y, 0.0, 0.9], (len(KEY_LANDMARKS), 1))
 
     def test_returns_posture_baseline(self):
         avg = self._make_avg()
@@ -217,27 +279,34 @@ class TestBaselineComputation:
 
     def test_shoulder_y_avg_is_correct(self):
         avg = self._make_avg()
-        avg[LEFT_SHOULDER]["y"] = 0.4
-        avg[RIGHT_SHOULDER]["y"] = 0.6
+        avg[_KEY_INDEX[LEFT_SHOULDER], 1] = 0.4
+        avg[_KEY_INDEX[RIGHT_SHOULDER], 1] = 0.6
         baseline = _compute_baseline(avg)
         assert baseline.shoulder_y_avg == pytest.approx(0.5)
 
     def test_shoulder_width_is_correct(self):
         avg = self._make_avg()
-        avg[LEFT_SHOULDER]["x"] = 0.3
-        avg[RIGHT_SHOULDER]["x"] = 0.7
+        avg[_KEY_INDEX[LEFT_SHOULDER], 0] = 0.3
+        avg[_KEY_INDEX[RIGHT_SHOULDER], 0] = 0.7
         baseline = _compute_baseline(avg)
         assert baseline.shoulder_width == pytest.approx(0.4)
 
     def test_torso_centroid_is_midpoint_of_shoulders_and_hips(self):
         avg = self._make_avg()
-        avg[LEFT_SHOULDER]["x"] = 0.2
-        avg[RIGHT_SHOULDER]["x"] = 0.8
-        avg[LEFT_HIP]["x"] = 0.3
-        avg[RIGHT_HIP]["x"] = 0.7
+        avg[_KEY_INDEX[LEFT_SHOULDER], 0] = 0.2
+        avg[_KEY_INDEX[RIGHT_SHOULDER], 0] = 0.8
+        avg[_KEY_INDEX[LEFT_HIP], 0] = 0.3
+        avg[_KEY_INDEX[RIGHT_HIP], 0] = 0.7
         baseline = _compute_baseline(avg)
         assert baseline.torso_centroid_x == pytest.approx(0.5)
 
+    def test_baseline_is_immutable(self):
+        baseline = _compute_baseline(self._make_avg())
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            baseline.neck_angle = 0.0
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            baseline.nose.x = 0.0
+
     def test_captured_at_is_recent(self):
         avg = self._make_avg()
         before = time.time()
@@ -245,6 +314,23 @@ class TestBaselineComputation:
         after = time.time()
         assert before <= baseline.captured_at <= after
 
+    def test_landmark_points_map_to_named_fields(self):
+        avg = np.array([[0.1 * i, 0.0, 0.0, 0.9] for i in range(len(KEY_LANDMARKS))])
+        baseline = _compute_baseline(avg)
+        assert baseline.nose.x == pytest.approx(avg[_KEY_INDEX[NOSE], 0])
+        assert baseline.left_ear.x == pytest.approx(avg[_KEY_INDEX[LEFT_EAR], 0])
+        assert baseline.right_shoulder.x == pytest.approx(avg[_KEY_INDEX[RIGHT_SHOULDER], 0])
+        assert baseline.right_hip.x == pytest.approx(avg[_KEY_INDEX[RIGHT_HIP], 0])
+
+    def test_neck_angle_matches_scalar_formula(self):
+        avg = self._make_avg()
+        avg[_KEY_INDEX[RIGHT_EAR], :2] = (0.6, 0.2)
+        avg[_KEY_INDEX[RIGHT_SHOULDER], :2] = (0.5, 0.5)
+        baseline = _compute_baseline(avg)
+        assert baseline.neck_angle == pytest.approx(
+            _neck_angle(baseline.right_ear, baseline.right_shoulder)
+        )
+
 
 # ---------------------------------------------------------------------------
 # Neck angle
@@ -278,19 +364,15 @@ class TestNeckAngle:
 
 
 class TestPersistence:
-    def test_save_creates_file(self, tmp_path):
-        mgr = _make_manager(capture_duration=0.0)
-        mgr.start()
-        mgr.add_frame(_make_landmarks())
+    def test_save_creates_file(self, tmp_path, completed_mgr):
+        mgr = completed_mgr
         assert mgr.state == CalibrationState.COMPLETE
         out = tmp_path / "calibration.json"
         mgr.save(out)
         assert out.exists()
 
-    def test_load_restores_baseline(self, tmp_path):
-        mgr = _make_manager(capture_duration=0.0)
-        mgr.start()
-        mgr.add_frame(_make_landmarks())
+    def test_load_restores_baseline(self, tmp_path, completed_mgr):
+        mgr = completed_mgr
         out = tmp_path / "calibration.json"
         mgr.save(out)
 
@@ -300,6 +382,32 @@ class TestPersistence:
         assert loaded.shoulder_y_avg == pytest.approx(mgr.baseline.shoulder_y_avg)
         assert loaded.torso_centroid_x == pytest.approx(mgr.baseline.torso_centroid_x)
 
+    def test_round_trip_without_orjson(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("src.calibration.orjson", None)
+        mgr = _make_manager(capture_duration=0.0)
+        mgr.start()
+        mgr.add_frame(_make_landmarks())
+        out = tmp_path / "calibration.json"
+        mgr.save(out)
+
+        loaded = CalibrationManager.load(out)
+        assert loaded.neck_angle == pytest.approx(mgr.baseline.neck_angle)
+        assert loaded.right_hip.y == pytest.approx(mgr.baseline.right_hip.y)
+
+    def test_dict_round_trip_preserves_baseline(self, completed_mgr):
+        mgr = completed_mgr
+        data = _baseline_to_dict(mgr.baseline)
+        assert isinstance(data["nose"], dict)
+        assert _baseline_from_dict(data) == mgr.baseline
+
+    def test_load_ignores_extra_keys(self, tmp_path, completed_mgr):
+        data = _baseline_to_dict(completed_mgr.baseline)
+        data["nose"]["presence"] = 0.99
+        data["schema_version"] = 2
+        out = tmp_path / "calibration.json"
+        out.write_text(json.dumps(data))
+        assert CalibrationManager.load(out) == completed_mgr.baseline
+
     def test_load_missing_file_raises(self, tmp_path):
         with pytest.raises(FileNotFoundError):
             CalibrationManager.load(tmp_path / "nonexistent.json")
@@ -309,27 +417,44 @@ class TestPersistence:
         with pytest.raises(RuntimeError, match="No baseline"):
             mgr.save(tmp_path / "out.json")
 
-    def test_save_creates_parent_dirs(self, tmp_path):
+    def test_restart_discards_saved_baseline(self, tmp_path):
         mgr = _make_manager(capture_duration=0.0)
         mgr.start()
         mgr.add_frame(_make_landmarks())
+        mgr.start()
+        with pytest.raises(RuntimeError, match="No baseline"):
+            mgr.save(tmp_path / "out.json")
+
+    def test_save_assigned_baseline(self, tmp_path, completed_mgr):
+        first = tmp_path / "first.json"
+        completed_mgr.save(first)
+        mgr = _make_manager()
+        mgr.baseline = CalibrationManager.load(first)
+        second = tmp_path / "second.json"
+        mgr.save(second)
+        assert CalibrationManager.load(second) == completed_mgr.baseline
+
+    def test_save_reassigned_baseline_after_capture(self, tmp_path, completed_mgr):
+        mgr = _make_manager(capture_duration=0.0)
+        mgr.start()
+        mgr.add_frame(_make_landmarks(overrides={NOSE: {"x": 0.2}}))
+        mgr.baseline = completed_mgr.baseline
+        out = tmp_path / "calibration.json"
+        mgr.save(out)
+        assert CalibrationManager.load(out) == completed_mgr.baseline
+
+    def test_save_creates_parent_dirs(self, tmp_path, completed_mgr):
+        mgr = completed_mgr
         nested = tmp_path / "a" / "b" / "calibration.json"
         mgr.save(nested)
         assert nested.exists()
 
-    def test_serialized_json_has_expected_keys(self, tmp_path):
-        mgr = _make_manager(capture_duration=0.0)
-        mgr.start()
-        mgr.add_frame(_make_landmarks())
+    def test_serialized_json_has_expected_keys(self, tmp_path, completed_mgr):
+        mgr = completed_mgr
         out = tmp_path / "calibration.json"
         mgr.save(out)
         data = json.loads(out.read_text())
-        expected_keys = {
-            "nose", "left_ear", "right_ear", "left_shoulder", "right_shoulder",
-            "left_hip", "right_hip", "neck_angle", "shoulder_y_avg",
-            "shoulder_width", "torso_centroid_x", "torso_centroid_y", "captured_at",
-        }
-        assert expected_keys == set(data.keys())
+        assert set(data.keys()) == _EXPECTED_BASELINE_KEYS
 
 
 # ---------------------------------------------------------------------------
@@ -360,11 +485,27 @@ class TestFullCaptureFlow:
         mgr2.add_frame(lms_a)
         mgr2.add_frame(lms_b)
 
-        # Force finalize
-        mgr2._manager_finalize = mgr2._finalize
-        mgr2.capture_duration = 0.0
-        mgr2.add_frame(_make_landmarks())  # this frame triggers finalize
+        # Force finalize by jumping to the end of the capture window
+        with patch("src.calibration.time.monotonic_ns", return_value=mgr2._deadline_ns):
+            mgr2.add_frame(_make_landmarks())  # this frame triggers finalize
 
         assert mgr2.state == CalibrationState.COMPLETE
         # Left shoulder x should be average of 0.3, 0.5, and 0.5 (third frame)
         assert mgr2.baseline.left_shoulder.x == pytest.approx((0.3 + 0.5 + 0.5) / 3, abs=0.01)
+
+    def test_buffer_is_sized_from_expected_fps(self):
+        mgr = _make_manager(capture_duration=2.0, expected_fps=10.0)
+        assert len(mgr._buf) == 31  # 2s * 10 FPS * 1.5 headroom, plus one
+
+    def test_negative_duration_still_allocates_buffer(self):
+        mgr = _make_manager(capture_duration=-1.0)
+        assert len(mgr._buf) == 1
+
+    def test_buffer_grows_past_initial_capacity(self):
+        mgr = _make_manager(capture_duration=10.0)
+        mgr.start()
+        capacity = len(mgr._buf)
+        for _ in range(capacity + 1):
+            mgr.add_frame(_make_landmarks())
+        assert mgr._n == capacity + 1
+        assert len(mgr._buf) > capacity